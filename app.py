@@ -2,7 +2,6 @@ from flask import Flask, render_template, request, jsonify, send_file
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
-import yt_dlp
 import os
 import re
 from pathlib import Path
@@ -17,16 +16,14 @@ import json
 from utils.cache import VideoInfoCache
 from utils.queue import DownloadQueue
 from utils.validator import URLValidator
+from utils.logger import setup_logging_from_env
+from utils.formats import FormatSelector
+from utils.downloader import extract_info, run_download, progress_from_hook
+from utils.jobs import JobStore
+from utils.broker import RemoteJobStore, parse_address
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (records are written by a background listener thread)
+setup_logging_from_env('app.log')
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
@@ -52,16 +49,33 @@ Path(app.config['DOWNLOAD_FOLDER']).mkdir(parents=True, exist_ok=True)
 
 # Initialize utilities
 video_cache = VideoInfoCache(max_size=100, ttl=3600)  # Cache for 1 hour
+# Full extraction results reused by downloads; stream URLs expire, so entries
+# expire a fixed time after extraction (read with touch=False)
+extraction_cache = VideoInfoCache(max_size=20, ttl=1800)
+format_selector = FormatSelector()
 download_queue = DownloadQueue()
 url_validator = URLValidator()
 
+# Coordinator mode: hand downloads to worker.py processes through the job queue,
+# either a database on this host or a broker.py on another one
+job_store = None
+if os.environ.get('JOB_BROKER'):
+    job_store = RemoteJobStore(parse_address(os.environ['JOB_BROKER']), token=os.environ.get('JOB_BROKER_TOKEN'))
+elif os.environ.get('JOB_QUEUE_DB'):
+    job_store = JobStore(
+        os.environ['JOB_QUEUE_DB'],
+        lease_seconds=int(os.environ.get('JOB_LEASE_SECONDS', 60)),
+        retention_hours=int(os.environ.get('JOB_RETENTION_HOURS', 24 * 7))
+    )
+
 # Store download progress and statistics
 download_progress = {}
 download_stats = {
     'total_downloads': 0,
     'successful_downloads': 0,
     'failed_downloads': 0,
-    'total_bytes_downloaded': 0
+    'total_bytes_downloaded': 0,
+    'total_download_seconds': 0
 }
 
 def sanitize_filename(filename):
@@ -74,34 +88,111 @@ def sanitize_filename(filename):
         filename = name[:200] + ext
     return filename
 
+def fetch_video_info(url):
+    """Extract video info once and cache both the summary and the raw result"""
+    cached_info = video_cache.get(url)
+    if cached_info and extraction_cache.get(url, touch=False):
+        logger.info(f"Cache hit for URL: {url}")
+        return cached_info
+    
+    logger.info(f"Fetching info for URL: {url}")
+    
+    info = extract_info(url)
+    
+    formats = format_selector.summarize(info)
+    
+    # Extract relevant information
+    video_info = {
+        'title': info.get('title', 'Unknown'),
+        'uploader': info.get('uploader', 'Unknown'),
+        'duration': info.get('duration', 0),
+        'thumbnail': info.get('thumbnail', ''),
+        'description': info.get('description', ''),
+        'view_count': info.get('view_count', 0),
+        'upload_date': info.get('upload_date', ''),
+        'formats_available': len(formats),
+        'formats': formats
+    }
+    
+    # Cache the result
+    video_cache.set(url, video_info)
+    extraction_cache.set(url, info)
+    
+    return video_info
+
+def resolve_format(formats, format_type, quality, audio_format):
+    """Pick a download plan from cached formats, with size and time estimates"""
+    plan = format_selector.select(formats, format_type, quality, audio_format)
+    
+    if plan:
+        stats = get_download_stats()
+        throughput = None
+        if stats['total_download_seconds']:
+            throughput = stats['total_bytes_downloaded'] / stats['total_download_seconds']
+        plan['estimated_seconds'] = format_selector.estimate_seconds(plan['estimated_size'], throughput)
+    
+    return plan
+
 def progress_hook(d, download_id):
     """Update download progress"""
     try:
-        if d['status'] == 'downloading':
-            percent = d.get('_percent_str', '0%').strip()
-            speed = d.get('_speed_str', 'N/A').strip()
-            eta = d.get('_eta_str', 'N/A').strip()
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-            
-            download_progress[download_id] = {
-                'status': 'downloading',
-                'percent': percent,
-                'speed': speed,
-                'eta': eta,
-                'downloaded_bytes': downloaded,
-                'total_bytes': total,
-                'filename': d.get('filename', '')
-            }
-        elif d['status'] == 'finished':
-            download_progress[download_id] = {
-                'status': 'processing',
-                'percent': '100%',
-                'message': 'Processing video...',
-                'filename': d.get('filename', '')
-            }
+        progress = progress_from_hook(d)
+        if progress:
+            download_progress[download_id] = progress
+    except Exception as e:
+        logger.error(f"Progress hook error: {str(e)}", extra={'download_id': download_id})
+
+def download_task(download_id, url, options, cached_info=None, resolve_formats=False):
+    """Run a download in this process"""
+    started_at = datetime.now()
+    try:
+        result = run_download(
+            url, options, app.config['DOWNLOAD_FOLDER'],
+            progress_hook=lambda d: progress_hook(d, download_id),
+            download_id=download_id,
+            cached_info=cached_info,
+            resolve_formats=resolve_formats
+        )
+        
+        download_progress[download_id] = {
+            'status': 'completed',
+            'percent': '100%',
+            **result
+        }
+        
+        # Update statistics
+        download_stats['total_downloads'] += 1
+        download_stats['successful_downloads'] += 1
+        download_stats['total_bytes_downloaded'] += result['filesize']
+        download_stats['total_download_seconds'] += (datetime.now() - started_at).total_seconds()
+        
+        logger.info(f"Download completed: {download_id} - {result['title']}", extra={'download_id': download_id})
+        
     except Exception as e:
-        logger.error(f"Progress hook error: {str(e)}")
+        error_msg = str(e)
+        logger.error(f"Download failed: {download_id} - {error_msg}", extra={'download_id': download_id})
+        download_progress[download_id] = {
+            'status': 'error',
+            'error': error_msg
+        }
+        download_stats['total_downloads'] += 1
+        download_stats['failed_downloads'] += 1
+
+def get_download_stats():
+    """Download statistics from this process or, in coordinator mode, the job store"""
+    if not job_store:
+        return download_stats
+    
+    status = job_store.get_status()
+    return {
+        'total_downloads': status['completed'] + status['failed'],
+        'successful_downloads': status['completed'],
+        'failed_downloads': status['failed'],
+        'total_bytes_downloaded': status['total_bytes_downloaded'],
+        'total_download_seconds': status['total_download_seconds'],
+        'queued_downloads': status['queued'],
+        'active_downloads': status['active']
+    }
 
 @app.route('/')
 def index():
@@ -136,41 +227,7 @@ def get_info():
         # Normalize URL
         url = url_validator.normalize_url(url)
         
-        # Check cache
-        cached_info = video_cache.get(url)
-        if cached_info:
-            logger.info(f"Cache hit for URL: {url}")
-            return jsonify(cached_info)
-        
-        logger.info(f"Fetching info for URL: {url}")
-        
-        # Fetch video info with YouTube bypass
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            # Extract relevant information
-            video_info = {
-                'title': info.get('title', 'Unknown'),
-                'uploader': info.get('uploader', 'Unknown'),
-                'duration': info.get('duration', 0),
-                'thumbnail': info.get('thumbnail', ''),
-                'description': info.get('description', ''),
-                'view_count': info.get('view_count', 0),
-                'upload_date': info.get('upload_date', ''),
-                'formats_available': len(info.get('formats', []))
-            }
-            
-            # Cache the result
-            video_cache.set(url, video_info)
-            
-            return jsonify(video_info)
+        return jsonify(fetch_video_info(url))
             
     except Exception as e:
         error_msg = str(e)
@@ -195,97 +252,59 @@ def download():
         if not url_validator.is_valid_youtube_url(url):
             return jsonify({'error': 'Invalid YouTube URL'}), 400
         
+        # Resolve formats up front when /api/info already cached them, so the
+        # download can skip a second extraction and report an estimate;
+        # otherwise the download task extracts and picks the format itself
+        plan = None
+        cached_info = None
+        is_playlist = url_validator.is_playlist_url(url)
+        if not is_playlist:
+            url = url_validator.normalize_url(url) or url
+            video_info = video_cache.get(url)
+            # Stream URLs can be tied to the extracting host, so remote workers re-extract
+            if not job_store:
+                cached_info = extraction_cache.get(url, touch=False)
+            if video_info:
+                plan = resolve_format(video_info['formats'], format_type, quality, audio_format)
+        
         download_id = str(uuid.uuid4())
-        download_progress[download_id] = {
-            'status': 'queued',
-            'percent': '0%',
-            'message': 'Download queued...'
+        options = {
+            'format': format_type,
+            'quality': quality,
+            'audioFormat': audio_format,
+            'plan': plan
         }
         
-        logger.info(f"Starting download: {download_id} for URL: {url}")
-        
-        def download_task():
-            try:
-                ydl_opts = {
-                    'outtmpl': os.path.join(app.config['DOWNLOAD_FOLDER'], '%(title)s.%(ext)s'),
-                    'progress_hooks': [lambda d: progress_hook(d, download_id)],
-                    'quiet': False,
-                    'no_warnings': False,
-                    'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
-                }
-                
-                if format_type == 'audio':
-                    # Audio format mapping
-                    audio_codec_map = {
-                        'mp3': 'mp3',
-                        'm4a': 'm4a',
-                        'opus': 'opus',
-                        'flac': 'flac',
-                        'wav': 'wav'
-                    }
-                    
-                    selected_codec = audio_codec_map.get(audio_format, 'mp3')
-                    
-                    ydl_opts.update({
-                        'format': 'bestaudio/best',
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': selected_codec,
-                            'preferredquality': '320' if selected_codec != 'flac' else None,
-                        }],
-                    })
-                else:
-                    # Video format selection
-                    format_map = {
-                        'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                        '2160p': 'bestvideo[height<=2160][ext=mp4]+bestaudio[ext=m4a]/best[height<=2160][ext=mp4]/best',
-                        '1440p': 'bestvideo[height<=1440][ext=mp4]+bestaudio[ext=m4a]/best[height<=1440][ext=mp4]/best',
-                        '1080p': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
-                        '720p': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
-                        '480p': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/best',
-                        '360p': 'bestvideo[height<=360][ext=mp4]+bestaudio[ext=m4a]/best[height<=360][ext=mp4]/best',
-                    }
-                    ydl_opts['format'] = format_map.get(quality, format_map['best'])
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    title = info.get('title', 'video')
-                    filesize = info.get('filesize', 0) or info.get('filesize_approx', 0)
-                    
-                    download_progress[download_id] = {
-                        'status': 'completed',
-                        'percent': '100%',
-                        'title': title,
-                        'filesize': filesize,
-                        'format': format_type,
-                        'quality': quality if format_type == 'video' else audio_format
-                    }
-                    
-                    # Update statistics
-                    download_stats['total_downloads'] += 1
-                    download_stats['successful_downloads'] += 1
-                    download_stats['total_bytes_downloaded'] += filesize
-                    
-                    logger.info(f"Download completed: {download_id} - {title}")
-                    
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Download failed: {download_id} - {error_msg}")
-                download_progress[download_id] = {
-                    'status': 'error',
-                    'error': error_msg
-                }
-                download_stats['total_downloads'] += 1
-                download_stats['failed_downloads'] += 1
-        
-        # Start download in background thread
-        thread = threading.Thread(target=download_task, daemon=True)
-        thread.start()
+        if job_store:
+            # Coordinator mode: a worker process leases and runs the job
+            job_store.enqueue(download_id, url, options)
+            logger.info(f"Queued download: {download_id} for URL: {url}", extra={'download_id': download_id})
+        else:
+            download_progress[download_id] = {
+                'status': 'queued',
+                'percent': '0%',
+                'message': 'Download queued...'
+            }
+            
+            logger.info(f"Starting download: {download_id} for URL: {url}", extra={'download_id': download_id})
+            
+            # Start download in background thread
+            thread = threading.Thread(target=download_task, args=(download_id, url, options, cached_info, not is_playlist), daemon=True)
+            thread.start()
         
-        return jsonify({
+        response = {
             'download_id': download_id,
             'message': 'Download started successfully'
-        })
+        }
+        if plan:
+            response.update({
+                'format_id': plan['format_id'],
+                'requires_merge': plan['requires_merge'],
+                'estimated_size': plan['estimated_size'],
+                'estimated_seconds': plan['estimated_seconds']
+            })
+        
+        return jsonify(response)
         
     except Exception as e:
         logger.error(f"Error starting download: {str(e)}")
@@ -296,21 +315,30 @@ def get_progress(download_id):
     """Get download progress"""
     if download_id in download_progress:
         return jsonify(download_progress[download_id])
+    if job_store:
+        job = job_store.get(download_id)
+        if job:
+            return jsonify(job['progress'])
     return jsonify({'error': 'Download not found'}), 404
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get download statistics"""
-    return jsonify(download_stats)
+    return jsonify(get_download_stats())
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    stats = get_download_stats()
+    if job_store:
+        active_downloads = job_store.get_status()['downloading']
+    else:
+        active_downloads = len([d for d in download_progress.values() if d.get('status') == 'downloading'])
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'active_downloads': len([d for d in download_progress.values() if d.get('status') == 'downloading']),
-        'total_downloads': download_stats['total_downloads']
+        'active_downloads': active_downloads,
+        'total_downloads': stats['total_downloads']
     })
 
 @app.errorhandler(429)
@@ -0,0 +1,60 @@
+"""
+Job broker for JAV Downloader Pro
+
+Serves the job database on this host to workers on other hosts. SQLite
+must stay on local disk (WAL does not work over network filesystems), so
+remote workers connect here instead of opening the database themselves:
+
+    python broker.py --db jobs.db --bind 0.0.0.0:5100
+    python worker.py --broker broker-host:5100
+"""
+import argparse
+import logging
+import os
+
+from utils.broker import JobBroker, parse_address
+from utils.jobs import JobStore
+from utils.logger import setup_logging_from_env
+
+logger = logging.getLogger('broker')
+
+
+def main():
+    """Parse arguments and serve the job store"""
+    parser = argparse.ArgumentParser(description='JAV Downloader Pro job broker')
+    parser.add_argument('--db', default=os.environ.get('JOB_QUEUE_DB', 'jobs.db'),
+                        help='Job database on local disk (default: $JOB_QUEUE_DB or jobs.db)')
+    parser.add_argument('--bind', default=os.environ.get('JOB_BROKER_BIND', '127.0.0.1:5100'),
+                        help='Address to listen on (default: 127.0.0.1:5100)')
+    parser.add_argument('--lease-seconds', type=int, default=int(os.environ.get('JOB_LEASE_SECONDS', 60)),
+                        help='Lease duration before a silent job is re-queued (default: 60)')
+    parser.add_argument('--insecure', action='store_true',
+                        help='Allow a non-local --bind without JOB_BROKER_TOKEN')
+    args = parser.parse_args()
+
+    setup_logging_from_env('broker.log')
+
+    token = os.environ.get('JOB_BROKER_TOKEN')
+    address = parse_address(args.bind)
+    if address[0] not in ('127.0.0.1', 'localhost', '::1') and not token:
+        if not args.insecure:
+            parser.error('refusing to listen on a non-local address without JOB_BROKER_TOKEN '
+                         '(pass --insecure to override)')
+        logger.warning("Broker is reachable from other hosts without JOB_BROKER_TOKEN set")
+
+    store = JobStore(
+        args.db,
+        lease_seconds=args.lease_seconds,
+        retention_hours=int(os.environ.get('JOB_RETENTION_HOURS', 24 * 7))
+    )
+
+    with JobBroker(store, address, token=token) as broker:
+        logger.info(f"Job broker listening on {address[0]}:{address[1]}")
+        try:
+            broker.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down broker")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,5 +4,9 @@ Utilities package for JAV Downloader Pro
 from .cache import VideoInfoCache
 from .queue import DownloadQueue
 from .validator import URLValidator
+from .formats import FormatSelector
+from .jobs import JobStore
+from .broker import JobBroker, RemoteJobStore
+from .logger import setup_logging, YtDlpLogger
 
-__all__ = ['VideoInfoCache', 'DownloadQueue', 'URLValidator']
+__all__ = ['VideoInfoCache', 'DownloadQueue', 'URLValidator', 'FormatSelector', 'JobStore', 'JobBroker', 'RemoteJobStore', 'setup_logging', 'YtDlpLogger']
@@ -0,0 +1,172 @@
+"""
+Job Broker Module
+Serves a local JobStore to workers on other hosts over TCP
+"""
+from typing import Optional, Dict, Any, Tuple
+import hmac
+import json
+import logging
+import socket
+import socketserver
+
+from .jobs import JobStore
+
+
+logger = logging.getLogger(__name__)
+
+# JobStore methods workers and the web app may call remotely
+ALLOWED_METHODS = (
+    'enqueue', 'lease', 'heartbeat', 'complete', 'fail',
+    'get', 'get_status', 'requeue_expired', 'clear_finished',
+)
+
+
+class BrokerError(Exception):
+    """Raised by RemoteJobStore when the broker rejects a call"""
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    """Handle newline-delimited JSON calls on one connection"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = {'result': self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response, default=str).encode() + b'\n')
+
+
+class JobBroker(socketserver.ThreadingTCPServer):
+    """TCP front end for a JobStore on the broker's local disk"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, store: JobStore, address: Tuple[str, int], token: Optional[str] = None):
+        """
+        Initialize broker
+
+        Args:
+            store: Job store backed by a database on this host
+            address: (host, port) to listen on
+            token: Shared secret clients must send (recommended off localhost)
+        """
+        self.store = store
+        self.token = token
+        super().__init__(address, _BrokerHandler)
+
+    def dispatch(self, request: Dict[str, Any]) -> Any:
+        """
+        Run one call against the store
+
+        Args:
+            request: {'token': ..., 'method': ..., 'params': {...}}
+
+        Returns:
+            The store method's return value
+        """
+        if self.token and not hmac.compare_digest(str(request.get('token') or ''), self.token):
+            raise BrokerError('Invalid broker token')
+
+        method = request.get('method')
+        if method == 'settings':
+            return {'lease_seconds': self.store.lease_seconds}
+        if method not in ALLOWED_METHODS:
+            raise BrokerError(f'Unknown method: {method}')
+
+        return getattr(self.store, method)(**request.get('params', {}))
+
+
+class RemoteJobStore:
+    """JobStore client that talks to a JobBroker"""
+
+    def __init__(self, address: Tuple[str, int], token: Optional[str] = None, timeout: float = 30):
+        """
+        Initialize client
+
+        Args:
+            address: (host, port) of the broker
+            token: Shared secret configured on the broker
+            timeout: Socket timeout in seconds
+        """
+        self.address = address
+        self.token = token
+        self.timeout = timeout
+        self._lease_seconds = None
+
+    @property
+    def lease_seconds(self) -> int:
+        """Lease duration configured on the broker"""
+        if self._lease_seconds is None:
+            self._lease_seconds = self._call('settings')['lease_seconds']
+        return self._lease_seconds
+
+    def _call(self, method: str, **params) -> Any:
+        """Send one call and wait for the response"""
+        request = json.dumps({'token': self.token, 'method': method, 'params': params}) + '\n'
+
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall(request.encode())
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+
+        if not line:
+            raise BrokerError('Broker closed the connection')
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise BrokerError(response['error'])
+        return response['result']
+
+    def enqueue(self, job_id: str, url: str, options: Dict[str, Any], priority: int = 5) -> None:
+        """Add job to queue"""
+        self._call('enqueue', job_id=job_id, url=url, options=options, priority=priority)
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next queued job"""
+        return self._call('lease', worker_id=worker_id)
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """Extend a lease and report progress"""
+        return self._call('heartbeat', job_id=job_id, worker_id=worker_id, progress=progress)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any], elapsed_seconds: float = 0) -> bool:
+        """Mark job as completed"""
+        return self._call('complete', job_id=job_id, worker_id=worker_id, result=result,
+                          elapsed_seconds=elapsed_seconds)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark job as failed"""
+        return self._call('fail', job_id=job_id, worker_id=worker_id, error=error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job"""
+        return self._call('get', job_id=job_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get queue status"""
+        return self._call('get_status')
+
+    def requeue_expired(self) -> int:
+        """Re-queue jobs whose lease has expired"""
+        return self._call('requeue_expired')
+
+    def clear_finished(self, older_than_hours: Optional[int] = None) -> int:
+        """Remove old completed and failed jobs"""
+        return self._call('clear_finished', older_than_hours=older_than_hours)
+
+
+def parse_address(value: str, default_port: int = 5100) -> Tuple[str, int]:
+    """
+    Parse a host:port string
+
+    Args:
+        value: 'host:port' or 'host'
+        default_port: Port used when none is given
+
+    Returns:
+        (host, port) tuple
+    """
+    host, _, port = value.rpartition(':') if ':' in value else (value, '', '')
+    return host or '127.0.0.1', int(port) if port else default_port
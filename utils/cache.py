@@ -24,12 +24,14 @@ class VideoInfoCache:
         self.access_times = {}
         self.lock = threading.Lock()
     
-    def get(self, key: str) -> Optional[Dict[Any, Any]]:
+    def get(self, key: str, touch: bool = True) -> Optional[Dict[Any, Any]]:
         """
         Get item from cache
         
         Args:
             key: Cache key (URL)
+            touch: Refresh the entry's age; pass False for a fixed expiry
+                counted from when the item was set
             
         Returns:
             Cached value or None if not found/expired
@@ -47,7 +49,8 @@ class VideoInfoCache:
                 return None
             
             # Update access time
-            self.access_times[key] = datetime.now()
+            if touch:
+                self.access_times[key] = datetime.now()
             return self.cache[key]
     
     def set(self, key: str, value: Dict[Any, Any]) -> None:
@@ -0,0 +1,181 @@
+"""
+Downloader Module
+Runs a single yt-dlp download; shared by the web app and workers
+"""
+from typing import Optional, Dict, Any, Callable
+import copy
+import logging
+import os
+
+import yt_dlp
+
+from .formats import FormatSelector
+from .logger import YtDlpLogger
+
+
+logger = logging.getLogger(__name__)
+
+
+# Shared yt-dlp options for extraction
+EXTRACT_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'color': {'stdout': 'no_color', 'stderr': 'no_color'},
+    'extract_flat': False,
+    'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
+}
+
+
+# Audio format mapping
+AUDIO_CODEC_MAP = {
+    'mp3': 'mp3',
+    'm4a': 'm4a',
+    'opus': 'opus',
+    'flac': 'flac',
+    'wav': 'wav'
+}
+
+# Video format selection
+FORMAT_MAP = {
+    'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+    '2160p': 'bestvideo[height<=2160][ext=mp4]+bestaudio[ext=m4a]/best[height<=2160][ext=mp4]/best',
+    '1440p': 'bestvideo[height<=1440][ext=mp4]+bestaudio[ext=m4a]/best[height<=1440][ext=mp4]/best',
+    '1080p': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
+    '720p': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
+    '480p': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/best',
+    '360p': 'bestvideo[height<=360][ext=mp4]+bestaudio[ext=m4a]/best[height<=360][ext=mp4]/best',
+}
+
+
+def extract_info(url: str, download_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract video info for later reuse by run_download()
+
+    Args:
+        url: Video URL
+        download_id: Download identifier attached to log records
+
+    Returns:
+        Sanitized extraction result
+    """
+    with yt_dlp.YoutubeDL({**EXTRACT_OPTS, 'logger': YtDlpLogger(download_id)}) as ydl:
+        info = ydl.extract_info(url, download=False)
+        # Drop the default selection (requested_formats etc.) so reprocessing
+        # honours our format; same as yt-dlp's download_with_info_file
+        return ydl.sanitize_info(info, remove_private_keys=True)
+
+
+def progress_from_hook(d: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a yt-dlp progress hook payload to a progress entry
+
+    Args:
+        d: Progress hook payload
+
+    Returns:
+        Progress entry or None for statuses that are not tracked
+    """
+    if d['status'] == 'downloading':
+        return {
+            'status': 'downloading',
+            'percent': d.get('_percent_str', '0%').strip(),
+            'speed': d.get('_speed_str', 'N/A').strip(),
+            'eta': d.get('_eta_str', 'N/A').strip(),
+            'downloaded_bytes': d.get('downloaded_bytes', 0),
+            'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate', 0),
+            'filename': d.get('filename', '')
+        }
+    elif d['status'] == 'finished':
+        return {
+            'status': 'processing',
+            'percent': '100%',
+            'message': 'Processing video...',
+            'filename': d.get('filename', '')
+        }
+    return None
+
+
+def run_download(
+    url: str,
+    options: Dict[str, Any],
+    download_folder: str,
+    progress_hook: Optional[Callable[[Dict[str, Any]], None]] = None,
+    download_id: Optional[str] = None,
+    cached_info: Optional[Dict[str, Any]] = None,
+    resolve_formats: bool = False,
+) -> Dict[str, Any]:
+    """
+    Download a video with yt-dlp
+
+    Args:
+        url: Video URL
+        options: Download options ('format', 'quality', 'audioFormat' and
+            optionally a resolved 'plan' from FormatSelector)
+        download_folder: Output directory
+        progress_hook: Called with each yt-dlp progress payload
+        download_id: Download identifier attached to log records
+        cached_info: Sanitized extraction result to reuse instead of extracting again
+        resolve_formats: Without a plan or cached info, extract first and pick
+            the format with FormatSelector (single videos only)
+
+    Returns:
+        Result with title, filesize, format and quality
+    """
+    format_type = options.get('format', 'video')
+    quality = options.get('quality', 'best')
+    audio_format = options.get('audioFormat', 'mp3')
+    plan = options.get('plan')
+
+    if resolve_formats and not plan and cached_info is None:
+        cached_info = extract_info(url, download_id)
+        selector = FormatSelector()
+        plan = selector.select(selector.summarize(cached_info), format_type, quality, audio_format)
+
+    ydl_opts = {
+        'outtmpl': os.path.join(download_folder, '%(title)s.%(ext)s'),
+        'progress_hooks': [progress_hook] if progress_hook else [],
+        'quiet': False,
+        'no_warnings': False,
+        # Plain text even on a TTY, so progress lines can be sampled
+        'color': {'stdout': 'no_color', 'stderr': 'no_color'},
+        'logger': YtDlpLogger(download_id),
+        'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
+    }
+
+    if format_type == 'audio':
+        selected_codec = AUDIO_CODEC_MAP.get(audio_format, 'mp3')
+
+        ydl_opts.update({
+            'format': f"{plan['format_id']}/bestaudio/best" if plan else 'bestaudio/best',
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': selected_codec,
+                'preferredquality': '320' if selected_codec != 'flac' else None,
+            }],
+        })
+    else:
+        ydl_opts['format'] = FORMAT_MAP.get(quality, FORMAT_MAP['best'])
+        if plan:
+            ydl_opts['format'] = f"{plan['format_id']}/{ydl_opts['format']}"
+            if plan['requires_merge']:
+                ydl_opts['merge_output_format'] = plan['container']
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        if cached_info:
+            try:
+                # yt-dlp annotates the info dict while downloading; keep the cached copy clean
+                info = ydl.process_ie_result(copy.deepcopy(cached_info), download=True)
+            except yt_dlp.utils.DownloadError as e:
+                # Stream URLs in cached info may have expired (HTTP 403); extract again once
+                logger.warning(f"Download from cached info failed, re-extracting: {str(e)}",
+                               extra={'download_id': download_id})
+                info = ydl.extract_info(url, download=True)
+        else:
+            info = ydl.extract_info(url, download=True)
+
+    return {
+        'title': info.get('title', 'video'),
+        'filesize': info.get('filesize', 0) or info.get('filesize_approx', 0),
+        'format': format_type,
+        'quality': quality if format_type == 'video' else audio_format
+    }
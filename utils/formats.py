@@ -0,0 +1,197 @@
+"""
+Format Selection Module
+Resolves download formats from cached video info
+"""
+from typing import Optional, Dict, Any, List
+
+
+class FormatSelector:
+    """Pick formats that avoid unnecessary ffmpeg work"""
+
+    # Target heights for the quality presets offered by the UI
+    QUALITY_HEIGHTS = {
+        'best': None,
+        '2160p': 2160,
+        '1440p': 1440,
+        '1080p': 1080,
+        '720p': 720,
+        '480p': 480,
+        '360p': 360,
+    }
+
+    # Video/audio extensions that can be merged by stream copy into the same container
+    COMPATIBLE_CONTAINERS = {
+        'mp4': ('m4a', 'mp4'),
+        'webm': ('webm',),
+    }
+
+    # Source audio codecs FFmpegExtractAudio can copy without re-encoding
+    AUDIO_COPY_CODECS = {
+        'm4a': ('mp4a', 'aac'),
+        'opus': ('opus',),
+    }
+
+    # Used for time estimates until real throughput has been measured
+    DEFAULT_THROUGHPUT = 2 * 1024 * 1024  # bytes per second
+
+    def summarize(self, info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Reduce yt-dlp formats to the fields needed for selection
+
+        Args:
+            info: Video info returned by yt-dlp
+
+        Returns:
+            List of format summaries
+        """
+        duration = info.get('duration') or 0
+        formats = []
+
+        for f in info.get('formats') or []:
+            vcodec = f.get('vcodec') or 'none'
+            acodec = f.get('acodec') or 'none'
+            if vcodec == 'none' and acodec == 'none':
+                # Storyboards and other non-media entries
+                continue
+
+            filesize = f.get('filesize') or f.get('filesize_approx')
+            if not filesize and f.get('tbr') and duration:
+                filesize = int(f['tbr'] * 1000 / 8 * duration)
+
+            formats.append({
+                'format_id': f.get('format_id'),
+                'ext': f.get('ext'),
+                'vcodec': vcodec,
+                'acodec': acodec,
+                'height': f.get('height'),
+                'tbr': f.get('tbr'),
+                'filesize': filesize or 0,
+                'muxed': vcodec != 'none' and acodec != 'none',
+            })
+
+        return formats
+
+    def select(self, formats: List[Dict[str, Any]], format_type: str = 'video',
+               quality: str = 'best', audio_format: str = 'mp3') -> Optional[Dict[str, Any]]:
+        """
+        Choose a download plan for the requested format type
+
+        Args:
+            formats: Format summaries from summarize()
+            format_type: 'video' or 'audio'
+            quality: Video quality preset
+            audio_format: Requested audio codec
+
+        Returns:
+            Download plan or None if no suitable formats are known
+        """
+        if format_type == 'audio':
+            return self.select_audio(formats, audio_format)
+        return self.select_video(formats, quality)
+
+    def select_video(self, formats: List[Dict[str, Any]], quality: str = 'best') -> Optional[Dict[str, Any]]:
+        """
+        Choose a video download plan
+
+        The highest available height within the requested quality wins;
+        among plans of that height a pre-muxed format is preferred, then a
+        video/audio pair that can be merged by stream copy.
+
+        Args:
+            formats: Format summaries from summarize()
+            quality: Quality preset (see QUALITY_HEIGHTS)
+
+        Returns:
+            Download plan or None if no suitable formats are known
+        """
+        max_height = self.QUALITY_HEIGHTS.get(quality)
+
+        def fits(f):
+            return f['height'] and (max_height is None or f['height'] <= max_height)
+
+        muxed = [f for f in formats if f['muxed'] and fits(f)]
+        video_only = [f for f in formats if f['acodec'] == 'none' and fits(f)]
+        audio_only = [f for f in formats if f['vcodec'] == 'none']
+
+        plans = []
+        for f in muxed:
+            plans.append(self._plan([f], merge=False, container=f['ext']))
+
+        for video in video_only:
+            for container, audio_exts in self.COMPATIBLE_CONTAINERS.items():
+                if video['ext'] != container:
+                    continue
+                audio = self._best([a for a in audio_only if a['ext'] in audio_exts])
+                if audio:
+                    plans.append(self._plan([video, audio], merge=True, container=container))
+
+        if not plans:
+            return None
+
+        # Height first, then avoid merging, then prefer mp4 output, then bitrate
+        return max(plans, key=lambda p: (
+            p['height'],
+            not p['requires_merge'],
+            p['container'] == 'mp4',
+            p['tbr'],
+        ))
+
+    def select_audio(self, formats: List[Dict[str, Any]], codec: str = 'mp3') -> Optional[Dict[str, Any]]:
+        """
+        Choose an audio download plan
+
+        Prefers a source whose codec matches the requested one so audio
+        extraction is a stream copy instead of a re-encode.
+
+        Args:
+            formats: Format summaries from summarize()
+            codec: Requested output codec
+
+        Returns:
+            Download plan or None if no audio formats are known
+        """
+        audio_only = [f for f in formats if f['vcodec'] == 'none' and f['acodec'] != 'none']
+        copy_codecs = self.AUDIO_COPY_CODECS.get(codec, ())
+
+        matching = [f for f in audio_only if f['acodec'].startswith(copy_codecs)] if copy_codecs else []
+        best = self._best(matching) or self._best(audio_only)
+        if not best:
+            return None
+
+        plan = self._plan([best], merge=False, container=best['ext'])
+        plan['requires_reencode'] = best not in matching
+        return plan
+
+    def estimate_seconds(self, size: int, throughput: Optional[float] = None) -> Optional[int]:
+        """
+        Estimate download time
+
+        Args:
+            size: Expected size in bytes
+            throughput: Measured bytes per second (falls back to DEFAULT_THROUGHPUT)
+
+        Returns:
+            Estimated seconds or None if the size is unknown
+        """
+        if not size:
+            return None
+        return int(size / (throughput or self.DEFAULT_THROUGHPUT)) + 1
+
+    @staticmethod
+    def _best(formats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Highest bitrate format from a list"""
+        if not formats:
+            return None
+        return max(formats, key=lambda f: f['tbr'] or 0)
+
+    @staticmethod
+    def _plan(parts: List[Dict[str, Any]], merge: bool, container: str) -> Dict[str, Any]:
+        """Build a download plan from one or more formats"""
+        return {
+            'format_id': '+'.join(p['format_id'] for p in parts),
+            'container': container,
+            'height': max(p['height'] or 0 for p in parts),
+            'tbr': sum(p['tbr'] or 0 for p in parts),
+            'estimated_size': sum(p['filesize'] for p in parts),
+            'requires_merge': merge,
+        }
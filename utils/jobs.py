@@ -0,0 +1,312 @@
+"""
+Job Store Module
+Durable SQLite job queue shared by the web app and download workers on one host
+"""
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+from datetime import datetime
+import json
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 5,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+    elapsed_seconds REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, priority, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (status, updated_at);
+"""
+
+
+class JobStore:
+    """SQLite-backed job queue with leases"""
+
+    # Finished jobs are purged at most this often (seconds), piggybacked on lease()
+    CLEANUP_INTERVAL = 3600
+
+    def __init__(self, path: str = 'jobs.db', lease_seconds: int = 60, max_attempts: int = 3,
+                 retention_hours: int = 24 * 7):
+        """
+        Initialize job store
+
+        Args:
+            path: SQLite database file on local disk (not a network filesystem;
+                workers on other hosts connect through a JobBroker)
+            lease_seconds: How long a worker owns a job without a heartbeat
+            max_attempts: Fail a job after this many expired leases
+            retention_hours: Remove completed/failed jobs older than this many hours
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_hours = retention_hours
+        self.last_cleanup = 0.0
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection; one per call keeps the store thread-safe"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, job_id: str, url: str, options: Dict[str, Any], priority: int = 5) -> None:
+        """
+        Add job to queue
+
+        Args:
+            job_id: Unique job identifier (the download id)
+            url: Video URL
+            options: Download options passed to run_download()
+            priority: Priority (1-10, lower is higher priority)
+        """
+        now = time.time()
+        progress = {'status': 'queued', 'percent': '0%', 'message': 'Download queued...'}
+
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, url, options, priority, progress, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, url, json.dumps(options), priority, json.dumps(progress), now, now)
+            )
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next queued job
+
+        Expired leases are re-queued first.
+
+        Args:
+            worker_id: Identifier of the leasing worker
+
+        Returns:
+            Job or None if queue is empty
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # Take the write lock up front so two workers cannot lease the same job
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._requeue_expired(conn, now)
+                if now - self.last_cleanup > self.CLEANUP_INTERVAL:
+                    self._clear_finished(conn, now - self.retention_hours * 3600)
+                    self.last_cleanup = now
+
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' "
+                    "ORDER BY priority, created_at LIMIT 1"
+                ).fetchone()
+
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (worker_id, now + self.lease_seconds, now, row['id'])
+                    )
+                    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        if row is None:
+            return None
+
+        return self._to_dict(row)
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Extend a lease and report progress
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the leasing worker
+            progress: Latest progress entry
+
+        Returns:
+            False if the worker no longer owns the job
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if progress is None:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                    "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                    (now + self.lease_seconds, now, job_id, worker_id)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_expires = ?, progress = ?, updated_at = ? "
+                    "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                    (now + self.lease_seconds, json.dumps(progress), now, job_id, worker_id)
+                )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any], elapsed_seconds: float = 0) -> bool:
+        """
+        Mark job as completed
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the leasing worker
+            result: Download result data
+            elapsed_seconds: Time spent downloading
+
+        Returns:
+            False if the worker no longer owns the job
+        """
+        progress = {'status': 'completed', 'percent': '100%', **result}
+        return self._finish(
+            job_id, worker_id, 'completed', progress,
+            result=json.dumps(result),
+            bytes_downloaded=result.get('filesize', 0) or 0,
+            elapsed_seconds=elapsed_seconds
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Mark job as failed
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the leasing worker
+            error: Error message
+
+        Returns:
+            False if the worker no longer owns the job
+        """
+        return self._finish(job_id, worker_id, 'failed', {'status': 'error', 'error': error}, error=error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get queue status
+
+        Returns:
+            Job counts per status and download totals
+        """
+        with self._connect() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            totals = conn.execute(
+                "SELECT COALESCE(SUM(bytes_downloaded), 0), COALESCE(SUM(elapsed_seconds), 0) "
+                "FROM jobs WHERE status = 'completed'"
+            ).fetchone()
+            active = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'leased' "
+                "AND json_extract(progress, '$.status') = 'downloading'"
+            ).fetchone()[0]
+
+        return {
+            'queued': counts.get('queued', 0),
+            'active': counts.get('leased', 0),
+            'downloading': active,
+            'completed': counts.get('completed', 0),
+            'failed': counts.get('failed', 0),
+            'total_bytes_downloaded': totals[0],
+            'total_download_seconds': totals[1]
+        }
+
+    def requeue_expired(self) -> int:
+        """
+        Re-queue jobs whose lease has expired
+
+        Returns:
+            Number of jobs re-queued or failed
+        """
+        with self._connect() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    def clear_finished(self, older_than_hours: Optional[int] = None) -> int:
+        """
+        Remove old completed and failed jobs
+
+        Args:
+            older_than_hours: Remove jobs finished more than this many hours ago
+                (default: retention_hours)
+
+        Returns:
+            Number of jobs removed
+        """
+        hours = self.retention_hours if older_than_hours is None else older_than_hours
+        with self._connect() as conn:
+            return self._clear_finished(conn, time.time() - hours * 3600)
+
+    def _clear_finished(self, conn: sqlite3.Connection, cutoff: float) -> int:
+        """Delete finished jobs last updated before cutoff"""
+        return conn.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+            (cutoff,)
+        ).rowcount
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        """Re-queue expired leases; give up after max_attempts"""
+        failed = conn.execute(
+            "UPDATE jobs SET status = 'failed', worker_id = NULL, lease_expires = NULL, "
+            "error = 'Lease expired too many times', progress = ?, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (json.dumps({'status': 'error', 'error': 'Lease expired too many times'}), now, now, self.max_attempts)
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires = NULL, "
+            "progress = ?, updated_at = ? WHERE status = 'leased' AND lease_expires < ?",
+            (json.dumps({'status': 'queued', 'percent': '0%', 'message': 'Download re-queued...'}), now, now)
+        ).rowcount
+        return failed + requeued
+
+    def _finish(self, job_id: str, worker_id: str, status: str, progress: Dict[str, Any], **fields) -> bool:
+        """Move a leased job to a final status"""
+        columns = ''.join(f', {name} = ?' for name in fields)
+        now = time.time()
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = ?, progress = ?, lease_expires = NULL, updated_at = ?{columns} "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (status, json.dumps(progress), now, *fields.values(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Decode a job row"""
+        job = dict(row)
+        for key in ('options', 'progress', 'result'):
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        job['created_at'] = datetime.fromtimestamp(job['created_at'])
+        job['updated_at'] = datetime.fromtimestamp(job['updated_at'])
+        return job
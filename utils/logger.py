@@ -0,0 +1,251 @@
+"""
+Logging Module
+Non-blocking, structured logging pipeline
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from datetime import datetime, timezone
+from typing import Optional, Dict, Tuple
+import logging
+import atexit
+import copy
+import os
+import queue
+import json
+import re
+import threading
+
+
+# Terminal colour codes yt-dlp adds when stdout is a TTY
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Serialize a log record
+
+        Args:
+            record: Log record to format
+
+        Returns:
+            JSON encoded record
+        """
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+
+        # Structured fields passed via `extra` (download_id, etc.)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps exc_info for the listener's formatters"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge message arguments without formatting the record
+
+        The stock prepare() bakes the traceback into `msg` and clears
+        exc_info; the queue is in-process, so the record can be passed on as is.
+
+        Args:
+            record: Log record to enqueue
+
+        Returns:
+            Copy of the record with `msg` resolved
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Only let every Nth noisy message through"""
+
+    # Per-fragment / progress lines emitted by yt-dlp
+    NOISY_PATTERN = re.compile(r'^\[download\]\s+(\d|.*[Ff]ragment)')
+    MAX_COUNTERS = 1000
+
+    def __init__(self, rate: int = 50):
+        """
+        Initialize filter
+
+        Args:
+            rate: Keep one out of every `rate` noisy messages
+        """
+        super().__init__()
+        self.rate = max(1, rate)
+        self.counters: Dict[Tuple[str, Optional[str]], int] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is emitted
+
+        Args:
+            record: Log record to check
+
+        Returns:
+            True if the record should be logged
+        """
+        if record.levelno > logging.INFO or not self.NOISY_PATTERN.match(record.getMessage()):
+            return True
+
+        key = (record.name, getattr(record, 'download_id', None))
+        with self.lock:
+            # Counters are per download; keep the table from growing unbounded
+            if key not in self.counters and len(self.counters) >= self.MAX_COUNTERS:
+                self.counters.clear()
+            count = self.counters.get(key, 0)
+            self.counters[key] = count + 1
+
+        return count % self.rate == 0
+
+
+class YtDlpLogger:
+    """Route yt-dlp output through the logging pipeline instead of stdout"""
+
+    def __init__(self, download_id: Optional[str] = None, name: str = 'yt_dlp'):
+        """
+        Initialize yt-dlp logger
+
+        Args:
+            download_id: Download identifier attached to every record
+            name: Logger name
+        """
+        self.logger = logging.getLogger(name)
+        self.extra = {'download_id': download_id} if download_id else {}
+
+    def debug(self, msg: str) -> None:
+        """Handle debug and regular screen output"""
+        msg = _ANSI_ESCAPE.sub('', msg)
+        # yt-dlp passes its regular screen output to debug() as well
+        if msg.startswith('[debug] '):
+            self.logger.debug(msg, extra=self.extra)
+        else:
+            self.logger.info(msg, extra=self.extra)
+
+    def info(self, msg: str) -> None:
+        """Handle info output"""
+        self.logger.info(_ANSI_ESCAPE.sub('', msg), extra=self.extra)
+
+    def warning(self, msg: str) -> None:
+        """Handle warnings"""
+        self.logger.warning(_ANSI_ESCAPE.sub('', msg), extra=self.extra)
+
+    def error(self, msg: str) -> None:
+        """Handle errors"""
+        self.logger.error(_ANSI_ESCAPE.sub('', msg), extra=self.extra)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    log_file: str = 'app.log',
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    sample_rate: int = 50,
+) -> QueueListener:
+    """
+    Configure queue-based logging for the root logger
+
+    Application threads only put records on an in-memory queue; a single
+    listener thread formats them and does the file/console I/O.
+
+    Size-based rotation is per process. When several processes (e.g.
+    gunicorn workers) log to the same place, put `{pid}` in `log_file`
+    to give each its own file, or pass max_bytes=0 and rotate externally
+    (logrotate); the file is then reopened when it is moved away.
+
+    Args:
+        level: Root log level
+        log_file: Path of the JSON log file; `{pid}` is replaced with the process id
+        max_bytes: Rotate the log file once it reaches this size (0 disables rotation)
+        backup_count: Number of rotated files to keep
+        sample_rate: Keep one out of every `sample_rate` per-fragment messages
+
+    Returns:
+        The running queue listener
+    """
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    log_file = log_file.replace('{pid}', str(os.getpid()))
+    if max_bytes > 0:
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+    else:
+        file_handler = WatchedFileHandler(log_file)
+    file_handler.setFormatter(JSONFormatter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = StructuredQueueHandler(log_queue)
+    # Sample before enqueueing so dropped records cost no queue traffic
+    queue_handler.addFilter(SamplingFilter(rate=sample_rate))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    return _listener
+
+
+def setup_logging_from_env(default_file: str = 'app.log') -> QueueListener:
+    """
+    Configure logging from the LOG_* environment variables
+
+    Args:
+        default_file: Log file used when LOG_FILE is not set
+
+    Returns:
+        The running queue listener
+    """
+    return setup_logging(
+        level=getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper(), logging.INFO),
+        log_file=os.environ.get('LOG_FILE', default_file),
+        max_bytes=int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backup_count=int(os.environ.get('LOG_BACKUP_COUNT', 5)),
+        sample_rate=int(os.environ.get('LOG_SAMPLE_RATE', 50))
+    )
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
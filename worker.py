@@ -0,0 +1,223 @@
+"""
+Download worker for JAV Downloader Pro
+
+Leases jobs from the job queue written by the web app, runs the downloads
+and reports progress and results back. Workers on the same host as the job
+database open it directly; workers on other hosts go through broker.py:
+
+    python worker.py --db jobs.db --concurrency 2
+    python worker.py --broker broker-host:5100 --concurrency 2
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from utils.broker import RemoteJobStore, parse_address
+from utils.downloader import run_download, progress_from_hook
+from utils.jobs import JobStore
+from utils.logger import setup_logging_from_env
+from utils.validator import URLValidator
+
+logger = logging.getLogger('worker')
+
+
+class LeaseLost(Exception):
+    """Raised inside a download when another worker has taken over the job"""
+
+
+class Worker:
+    """Lease jobs from the job store and run them"""
+
+    def __init__(self, store, download_folder: str, worker_id: str = None,
+                 poll_interval: float = 2.0, heartbeat_interval: float = None,
+                 progress_interval: float = 1.0):
+        """
+        Initialize worker
+
+        Args:
+            store: JobStore or RemoteJobStore
+            download_folder: Output directory
+            worker_id: Unique worker identifier (default: host name + random suffix)
+            poll_interval: Seconds to wait when the queue is empty
+            heartbeat_interval: Seconds between lease renewals (default: a third of the lease)
+            progress_interval: Minimum seconds between progress writes
+        """
+        self.store = store
+        self.download_folder = download_folder
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or store.lease_seconds / 3
+        self.progress_interval = progress_interval
+        self.url_validator = URLValidator()
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        """Process jobs until stopped"""
+        logger.info(f"Worker {self.worker_id} started")
+
+        while not self.stop_event.is_set():
+            try:
+                job = self.store.lease(self.worker_id)
+            except Exception as e:
+                logger.error(f"Failed to lease job: {str(e)}")
+                job = None
+
+            if job is None:
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            try:
+                self.process(job)
+            except Exception as e:
+                # Never let one job (or a store outage) end this worker thread
+                logger.exception(f"Unexpected error processing job {job.get('id')}: {str(e)}")
+
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def process(self, job: dict) -> None:
+        """
+        Run a single leased job
+
+        Args:
+            job: Job returned by JobStore.lease()
+        """
+        job_id = job['id']
+        extra = {'download_id': job_id}
+        lease_lost = threading.Event()
+        done = threading.Event()
+        last_report = {'at': 0.0}
+
+        def renew(progress=None):
+            try:
+                if not self.store.heartbeat(job_id, self.worker_id, progress):
+                    lease_lost.set()
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {job_id} - {str(e)}", extra=extra)
+
+        def keep_alive():
+            # Renew the lease even while ffmpeg runs and no progress hooks fire
+            while not done.wait(self.heartbeat_interval) and not lease_lost.is_set():
+                renew()
+
+        def hook(d):
+            if lease_lost.is_set():
+                raise LeaseLost(f"Lease lost for job {job_id}")
+            progress = progress_from_hook(d)
+            if not progress:
+                return
+            # Publish progress for /api/progress; throttled to spare the database
+            now = time.monotonic()
+            if progress['status'] != 'downloading' or now - last_report['at'] >= self.progress_interval:
+                last_report['at'] = now
+                renew(progress)
+
+        # Jobs may come from a broker, so don't trust the web app's validation
+        if not self.url_validator.is_valid_youtube_url(job['url']):
+            logger.error(f"Rejected job with invalid URL: {job_id} - {job['url']}", extra=extra)
+            self._report('fail', job_id, self.worker_id, 'Invalid YouTube URL')
+            return
+
+        logger.info(f"Starting download: {job_id} for URL: {job['url']} (attempt {job['attempts']})", extra=extra)
+
+        heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat_thread.start()
+        started_at = datetime.now()
+
+        try:
+            # The API tier does not extract; pick the format here unless it sent a plan
+            result = run_download(job['url'], job['options'], self.download_folder,
+                                  progress_hook=hook, download_id=job_id,
+                                  resolve_formats=not self.url_validator.is_playlist_url(job['url']))
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Download failed: {job_id} - {error_msg}", extra=extra)
+            if not lease_lost.is_set():
+                self._report('fail', job_id, self.worker_id, error_msg)
+        else:
+            elapsed = (datetime.now() - started_at).total_seconds()
+            reported = self._report('complete', job_id, self.worker_id, result, elapsed)
+            if reported:
+                logger.info(f"Download completed: {job_id} - {result['title']}", extra=extra)
+            elif reported is False:
+                logger.warning(f"Download completed after lease was lost: {job_id}", extra=extra)
+        finally:
+            done.set()
+            heartbeat_thread.join()
+
+    def _report(self, method: str, job_id: str, *args) -> Optional[bool]:
+        """
+        Report a job's outcome to the store
+
+        Args:
+            method: 'complete' or 'fail'
+            job_id: Job identifier
+            *args: Remaining arguments for the store method
+
+        Returns:
+            The store's answer, or None if the store could not be reached
+            (the lease then expires and the job is re-queued)
+        """
+        try:
+            return getattr(self.store, method)(job_id, *args)
+        except Exception as e:
+            logger.error(f"Could not {method} job {job_id}, leaving lease to expire: {str(e)}",
+                         extra={'download_id': job_id})
+            return None
+
+    def stop(self) -> None:
+        """Stop after the current job finishes"""
+        self.stop_event.set()
+
+
+def main():
+    """Parse arguments and run worker threads"""
+    parser = argparse.ArgumentParser(description='JAV Downloader Pro download worker')
+    parser.add_argument('--db', default=os.environ.get('JOB_QUEUE_DB', 'jobs.db'),
+                        help='Job database on this host (default: $JOB_QUEUE_DB or jobs.db)')
+    parser.add_argument('--broker', default=os.environ.get('JOB_BROKER'),
+                        help='host:port of a broker.py, for workers on other hosts')
+    parser.add_argument('--download-folder', default=os.environ.get('DOWNLOAD_FOLDER', 'downloads'),
+                        help='Output directory (default: downloads)')
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('WORKER_CONCURRENCY', 1)),
+                        help='Downloads to run in parallel (default: 1)')
+    parser.add_argument('--lease-seconds', type=int, default=int(os.environ.get('JOB_LEASE_SECONDS', 60)),
+                        help='Lease duration before a silent job is re-queued (default: 60; ignored with --broker)')
+    args = parser.parse_args()
+
+    setup_logging_from_env('worker.log')
+
+    Path(args.download_folder).mkdir(parents=True, exist_ok=True)
+    if args.broker:
+        store = RemoteJobStore(parse_address(args.broker), token=os.environ.get('JOB_BROKER_TOKEN'))
+    else:
+        store = JobStore(
+            args.db,
+            lease_seconds=args.lease_seconds,
+            retention_hours=int(os.environ.get('JOB_RETENTION_HOURS', 24 * 7))
+        )
+    workers = [Worker(store, args.download_folder) for _ in range(max(1, args.concurrency))]
+
+    threads = [threading.Thread(target=w.run, daemon=True) for w in workers]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Shutting down, waiting for running downloads...")
+        for w in workers:
+            w.stop()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == '__main__':
+    main()